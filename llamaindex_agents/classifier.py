@@ -0,0 +1,24 @@
+"""
+Shared query classification.
+
+One LlamaIndexRouter per process holds the compiled finance and company
+matchers; agents and the workflow classify queries through it instead of
+keeping their own keyword lists.
+"""
+
+from router import LlamaIndexRouter
+
+_ROUTER = None
+
+
+def get_router() -> LlamaIndexRouter:
+    """Return the process-wide router, building it on first use"""
+    global _ROUTER
+    if _ROUTER is None:
+        _ROUTER = LlamaIndexRouter()
+    return _ROUTER
+
+
+def is_finance_query(query: str) -> bool:
+    """Determine if a query is finance-related"""
+    return get_router().is_finance_query(query)
@@ -3,23 +3,11 @@ from typing import Dict, Any
 from llama_index.llms.openai import OpenAI
 from schemas import MCPRequest, MCPResponse
 from monitor import MonitorAgent
+from classifier import is_finance_query
 
-class GeneralAgent:
-    def __init__(self):
-        self.monitor = MonitorAgent()
-        self.llm = OpenAI(model="gpt-3.5-turbo", temperature=0.2)
-
-    def run(self, request: MCPRequest) -> MCPResponse:
-        """Process general queries using LlamaIndex LLM"""
-        start_time = datetime.now()
-        user_query = request.context.user_query
-        companies = request.context.companies
-        status = "processing"
-
-        try:
-            # Determine if this is a finance-related query that should be handled by other agents
-            if self._is_finance_query(user_query):
-                prompt = f"""
+# Prompt templates, filled in with str.format(user_query=...) per request.
+# Finance queries get general guidance plus a pointer to the specialized agents
+_FINANCE_PROMPT_TMPL = """
                 You are a helpful financial assistant. The user has asked: "{user_query}"
 
                 This appears to be a finance-related question. I can provide general guidance, but for detailed financial analysis including:
@@ -34,9 +22,9 @@ class GeneralAgent:
 
                 Please provide a helpful general response while noting that specialized financial agents can provide more detailed analysis.
                 """
-            else:
-                # Handle general non-finance queries
-                prompt = f"""
+
+# General non-finance queries
+_GENERAL_PROMPT_TMPL = """
                 You are a helpful AI assistant. Please provide a comprehensive and accurate response to the following question:
 
                 {user_query}
@@ -44,13 +32,44 @@ class GeneralAgent:
                 Provide factual, helpful information that directly addresses the user's question.
                 """
 
+# One LLM client per process so new GeneralAgent instances don't rebuild it
+_LLM = None
+
+
+def _get_llm() -> OpenAI:
+    """Return the shared GeneralAgent LLM client, building it on first use"""
+    global _LLM
+    if _LLM is None:
+        _LLM = OpenAI(model="gpt-3.5-turbo", temperature=0.2)
+    return _LLM
+
+
+class GeneralAgent:
+    def __init__(self):
+        self.monitor = MonitorAgent()
+        self.llm = _get_llm()
+
+    def run(self, request: MCPRequest) -> MCPResponse:
+        """Process general queries using LlamaIndex LLM"""
+        start_time = datetime.now()
+        user_query = request.context.user_query
+        companies = request.context.companies
+        status = "processing"
+
+        try:
+            # Determine if this is a finance-related query that should be handled by other agents
+            q_is_finance = is_finance_query(user_query)
+            prompt = (_FINANCE_PROMPT_TMPL if q_is_finance else _GENERAL_PROMPT_TMPL).format(
+                user_query=user_query
+            )
+
             response = self.llm.complete(prompt)
             response_text = str(response)
 
             response_data = {
                 "query": user_query,
                 "response": response_text,
-                "query_type": "finance_related" if self._is_finance_query(user_query) else "general",
+                "query_type": "finance_related" if q_is_finance else "general",
                 "companies_mentioned": companies if companies else [],
                 "timestamp": datetime.now().isoformat()
             }
@@ -74,20 +93,6 @@ class GeneralAgent:
             timestamp=completed_time
         )
 
-    def _is_finance_query(self, query: str) -> bool:
-        """Determine if a query is finance-related"""
-        finance_keywords = [
-            "stock", "stocks", "investment", "invest", "finance", "financial",
-            "bank", "banking", "loan", "credit", "dividend", "equity", "bond",
-            "portfolio", "asset", "liability", "revenue", "profit", "earnings",
-            "market", "trading", "ticker", "SEC", "10-K", "10-Q", "filing",
-            "balance sheet", "income statement", "cash flow", "valuation",
-            "P/E ratio", "EPS", "market cap", "merger", "acquisition", "IPO"
-        ]
-
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in finance_keywords)
-
     def get_system_info(self) -> Dict[str, Any]:
         """Get information about the FinanceAgents system"""
         return {
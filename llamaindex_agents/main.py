@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 import openai
 import json
+import orjson
 
 # Import FinanceAgents Workflow and schemas
 from financeagents_workflow import run_financeagents_analysis
@@ -108,7 +109,7 @@ ANALYSIS SOURCES:
 {contributions_text}
 
 DETAILED AGENT RESPONSES:
-{json.dumps(all_agent_data, ensure_ascii=False, indent=2)}
+{orjson.dumps(all_agent_data, option=orjson.OPT_INDENT_2).decode()}
 
 Please provide a comprehensive executive summary that:
 
@@ -197,19 +198,18 @@ async def improve_agent_response(agent: str, content: str) -> str:
 async def get_query_response(query: str) -> dict:
     """Process query through FinanceAgents Workflow"""
     try:
-        start_time = datetime.now()
+        start_time = time.perf_counter()
 
         print(f"\n{'='*60}")
         print(f"🚀 Starting FinanceAgents Workflow Analysis")
         print(f"📝 Query: {query}")
-        print(f"🕐 Start Time: {start_time.strftime('%H:%M:%S')}")
+        print(f"🕐 Start Time: {time.strftime('%H:%M:%S')}")
         print(f"{'='*60}")
 
         # Execute the workflow
         workflow_result = await run_financeagents_analysis(query, timeout=300)
 
-        end_time = datetime.now()
-        total_time = (end_time - start_time).total_seconds()
+        total_time = time.perf_counter() - start_time
 
         print(f"\n{'='*60}")
         print(f"🎯 FinanceAgents Workflow Results")
@@ -249,18 +249,6 @@ async def get_query_response(query: str) -> dict:
 
         return {"error": str(e)}
 
-def _get_agent_key(agent: str) -> str:
-    """Map agent names to consistent output keys"""
-    agent_mapping = {
-        "reddit": "RedditAgent",
-        "finance": "FinanceAgent",
-        "yahoo": "YahooAgent",
-        "sec": "SecAgent",
-        "general": "GeneralAgent"
-    }
-
-    return agent_mapping.get(agent, f"{agent.capitalize()}Agent")
-
 async def main():
     """Main entry point - runs both FastAPI server and CLI"""
     config = uvicorn.Config(app, host="0.0.0.0", port=8001, log_level="info")
@@ -1,13 +1,23 @@
+import os
 import json
 from datetime import datetime
 from typing import Optional
 
 class MonitorAgent:
-    def __init__(self, log_file: str = "monitor_logs.json"):
+    __slots__ = ("log_file", "enabled")
+
+    def __init__(self, log_file: str = "monitor_logs.json", enabled: Optional[bool] = None):
         self.log_file = log_file
+        # MONITOR_ENABLED=0 turns logging off without touching call sites
+        self.enabled = os.getenv("MONITOR_ENABLED", "1") != "0" if enabled is None else enabled
+
+    def log_health(self, agent_name: str, status: str, details: Optional[str] = None, *args):
+        """Log agent health status; details is %-formatted with args only when logging is enabled"""
+        if not self.enabled:
+            return
+        if args:
+            details = details % args
 
-    def log_health(self, agent_name: str, status: str, details: Optional[str] = None):
-        """Log agent health status"""
         log_entry = {
             "timestamp": datetime.now().isoformat(),
             "agent": agent_name,
@@ -23,6 +33,9 @@ class MonitorAgent:
 
     def log_error(self, agent_name: str, error: str, context: Optional[dict] = None):
         """Log agent errors"""
+        if not self.enabled:
+            return
+
         log_entry = {
             "timestamp": datetime.now().isoformat(),
             "agent": agent_name,
@@ -1,13 +1,97 @@
 import os
 import re
-import json
 import asyncio
+import functools
+import importlib
+import inspect
+import time
+import orjson
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from schemas import MCPRequest, MCPResponse, MCPContext
 from monitor import MonitorAgent
 
+# Agent name -> module defining it. Imported lazily to avoid circular
+# dependencies, then cached so later requests skip the import machinery.
+_AGENT_MODULES = {
+    "GeneralAgent": "general_agent",
+    "FinanceAgent": "finance_agent",
+    "YahooAgent": "yahoo_agent",
+    "SECAgent": "sec_agent",
+    "RedditAgent": "reddit_agent",
+}
+_AGENT_CACHE: Dict[str, type] = {}
+
+def _get_agent_class(agent_name: str) -> type:
+    """Resolve an agent class by name, importing its module on first use"""
+    cls = _AGENT_CACHE.get(agent_name)
+    if cls is None:
+        module = importlib.import_module(_AGENT_MODULES[agent_name])
+        cls = _AGENT_CACHE.setdefault(agent_name, getattr(module, agent_name))
+    return cls
+
+# Agent name -> key of its entry in routed response data
+AGENT_KEYS = {
+    "GeneralAgent": "general",
+    "FinanceAgent": "finance",
+    "YahooAgent": "yahoo",
+    "SECAgent": "sec",
+    "RedditAgent": "reddit",
+}
+
+# Routing logs are written by one background task per event loop so that
+# route() never blocks on file I/O
+_LOG_FILE = "monitor_logs.json"
+_LOG_QUEUE: Optional[asyncio.Queue] = None
+_LOG_WRITER_TASK: Optional[asyncio.Task] = None
+# Epoch-second fields that are only formatted as datetimes by the writer
+_LOG_TIMESTAMP_FIELDS = ("timestamp", "completed_timestamp")
+# Buffered entries are flushed after this many writes or seconds, whichever comes first
+_LOG_BUFFER_SIZE = 65536
+_LOG_FLUSH_EVERY = 32
+_LOG_FLUSH_SECONDS = 1.0
+
+async def _log_writer(queue: asyncio.Queue):
+    """Drain queued routing logs into the log file"""
+    try:
+        with open(_LOG_FILE, "ab", buffering=_LOG_BUFFER_SIZE) as f:
+            pending = 0
+            while True:
+                try:
+                    routing_log = await asyncio.wait_for(
+                        queue.get(), timeout=_LOG_FLUSH_SECONDS if pending else None
+                    )
+                except asyncio.TimeoutError:
+                    f.flush()
+                    pending = 0
+                    continue
+
+                for field in _LOG_TIMESTAMP_FIELDS:
+                    if field in routing_log:
+                        routing_log[field] = datetime.fromtimestamp(routing_log[field])
+                f.write(orjson.dumps(routing_log) + b"\n")
+                pending += 1
+                if pending >= _LOG_FLUSH_EVERY:
+                    f.flush()
+                    pending = 0
+    except Exception as e:
+        print(f"[LlamaIndexRouter] Log writer stopped: {e}")
+
+def _enqueue_routing_log(routing_log: Dict[str, Any]):
+    """Queue a routing log entry, starting the writer task on first use"""
+    global _LOG_QUEUE, _LOG_WRITER_TASK
+    loop = asyncio.get_running_loop()
+    if _LOG_WRITER_TASK is None or _LOG_WRITER_TASK.done() or _LOG_WRITER_TASK.get_loop() is not loop:
+        _LOG_QUEUE = asyncio.Queue()
+        _LOG_WRITER_TASK = loop.create_task(_log_writer(_LOG_QUEUE))
+    _LOG_QUEUE.put_nowait(routing_log)
+
 class LlamaIndexRouter:
+    # Minimum seconds between stat() checks of the raw data directory
+    RAW_DATA_REFRESH_SECONDS = 30.0
+    # Distinct queries whose classification is memoized
+    CLASSIFY_CACHE_SIZE = 4096
+
     def __init__(self):
         self.monitor = MonitorAgent()
 
@@ -39,106 +123,162 @@ class LlamaIndexRouter:
             "ibm": "IBM",
         }
 
+        # Precompiled matchers reused on every query: each vocabulary is a word
+        # set plus one phrase alternation, so each query is scanned in a single
+        # pass. The vocabularies themselves are built with the raw data keywords
+        # in _load_additional_finance_keywords
+        self._word_re = re.compile(r'\w+')
+        self._ticker_re = re.compile(r'\b[A-Z]{2,5}\b')
+
+        # Raw data directory state, cached so queries don't rescan the directory
+        self._raw_data_dir = "./raw_data"
+        self._base_finance_keywords = list(self.finance_keywords)
+        self._raw_data_mtime = None
+        self._raw_data_checked_at = 0.0
+
+        # Exact-match memo of query classification, cleared on raw data reload
+        self._classify = functools.lru_cache(maxsize=self.CLASSIFY_CACHE_SIZE)(self._classify_query)
+
         # Load additional keywords from raw data directory
         self._load_additional_finance_keywords()
 
     def _load_additional_finance_keywords(self):
-        """Load additional finance keywords from document filenames"""
-        raw_data_dir = "./raw_data"
+        """Load additional finance keywords and company names from document filenames"""
+        raw_data_dir = self._raw_data_dir
+        self._raw_data_checked_at = time.monotonic()
+        file_bases = []
+        self._raw_data_mtime = None
         if os.path.exists(raw_data_dir):
             try:
-                file_topics = [
-                    os.path.splitext(f)[0].replace("-", " ").replace("_", " ")
+                self._raw_data_mtime = os.stat(raw_data_dir).st_mtime
+                file_bases = [
+                    os.path.splitext(f)[0]
                     for f in os.listdir(raw_data_dir)
                     if f.lower().endswith(".pdf")
                 ]
-                self.finance_keywords.extend(file_topics)
             except Exception as e:
                 self.monitor.log_error("LlamaIndexRouter", f"Error loading additional keywords: {e}")
 
+        file_topics = [base.replace("-", " ").replace("_", " ") for base in file_bases]
+        self.finance_keywords = self._base_finance_keywords + file_topics
+        self._finance_words, self._finance_phrase_re = self._split_vocabulary(self.finance_keywords)
+        # Companies named by raw data files are matched alongside the known ones
+        self._company_words, self._company_phrase_re = self._split_vocabulary(
+            list(self.company_ticker_map) + [base.split("-")[0] for base in file_bases]
+        )
+        self._classify.cache_clear()
+
+    def _maybe_refresh_raw_data(self):
+        """Reload raw data keywords if the directory changed since the last check"""
+        now = time.monotonic()
+        if now - self._raw_data_checked_at < self.RAW_DATA_REFRESH_SECONDS:
+            return
+        self._raw_data_checked_at = now
+
+        try:
+            mtime = os.stat(self._raw_data_dir).st_mtime
+        except OSError:
+            mtime = None
+
+        if mtime != self._raw_data_mtime:
+            self._load_additional_finance_keywords()
+
+    def _split_vocabulary(self, keywords) -> Tuple[frozenset, re.Pattern]:
+        """Split keywords into a single-word set and a phrase alternation"""
+        # Single-word keywords are matched by membership against the query's
+        # words, which is equivalent to a \b-bounded search for each of them
+        keywords = [keyword.lower() for keyword in keywords]
+        words = frozenset(k for k in keywords if self._word_re.fullmatch(k))
+        return words, self._compile_keyword_union(k for k in keywords if k not in words)
+
+    def _compile_keyword_union(self, keywords) -> re.Pattern:
+        """Compile keywords into a single word-bounded alternation"""
+        # Longest first so a keyword never shadows a longer phrase it prefixes
+        alternatives = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+        if not alternatives:
+            return re.compile(r'(?!)')
+        return re.compile(r'\b(?:' + '|'.join(map(re.escape, alternatives)) + r')\b')
+
+    def _classify_query(self, query: str) -> Tuple[bool, Tuple[str, ...]]:
+        """Classify a query as (is finance-related, companies mentioned)"""
+        query_lower = query.lower()
+        words = self._word_re.findall(query_lower)
+
+        # Check against known and raw data companies
+        company_words = self._company_words
+        companies = dict.fromkeys(word for word in words if word in company_words)
+        for match in self._company_phrase_re.finditer(query_lower):
+            companies[match.group(0)] = None
+
+        return self._is_finance_text(query, query_lower, words), tuple(companies)
+
     def extract_companies(self, query: str) -> List[str]:
         """Extract company names from query"""
-        companies = set()
         if not query:
             return []
 
-        query_lower = query.lower()
-
-        # Check against known companies
-        for company_name in self.company_ticker_map.keys():
-            try:
-                if re.search(rf'\b{re.escape(company_name)}\b', query_lower):
-                    companies.add(company_name)
-            except re.error:
-                if company_name in query_lower:
-                    companies.add(company_name)
-
-        # Check against raw data directory files
-        raw_data_dir = "./raw_data"
-        if os.path.exists(raw_data_dir):
-            try:
-                for fname in os.listdir(raw_data_dir):
-                    if fname.lower().endswith(".pdf"):
-                        base = os.path.splitext(fname)[0]
-                        company = base.split("-")[0] if "-" in base else base
-                        company_lower = company.lower()
-                        try:
-                            if re.search(rf'\b{re.escape(company_lower)}\b', query_lower):
-                                companies.add(company_lower)
-                        except re.error:
-                            if company_lower in query_lower:
-                                companies.add(company_lower)
-            except Exception as e:
-                self.monitor.log_error("LlamaIndexRouter", f"Error extracting companies: {e}")
-
-        return list(companies)
+        self._maybe_refresh_raw_data()
+        return list(self._classify(query)[1])
 
     def map_to_tickers(self, companies: List[str]) -> List[str]:
         """Map company names to stock tickers"""
         if not companies:
             return []
 
-        tickers = []
-        for company in companies:
-            ticker = self.company_ticker_map.get(company.lower())
-            if ticker:
-                tickers.append(ticker)
-
-        return list(set(tickers))
+        # extract_companies already returns lowercased names; dict.fromkeys
+        # dedupes while keeping first-mention order
+        return list(dict.fromkeys(
+            ticker for company in companies
+            if (ticker := self.company_ticker_map.get(company)) is not None
+        ))
 
     def is_finance_query(self, query: str) -> bool:
         """Determine if query is finance-related"""
         if not query or not isinstance(query, str):
             return False
 
-        query_lower = query.lower()
+        self._maybe_refresh_raw_data()
+        return self._classify(query)[0]
 
+    def _is_finance_text(self, query: str, query_lower: str, words: List[str]) -> bool:
+        """Match finance keywords and ticker patterns against a query"""
         # Check for finance keywords
-        for keyword in self.finance_keywords:
-            try:
-                if re.search(rf'\b{re.escape(keyword)}\b', query_lower):
-                    return True
-            except re.error:
-                if keyword in query_lower:
-                    return True
+        if not self._finance_words.isdisjoint(words):
+            return True
+        if self._finance_phrase_re.search(query_lower):
+            return True
 
         # Check for ticker patterns (e.g., AAPL, MSFT)
-        try:
-            if re.search(r'\b[A-Z]{2,5}\b', query):
-                return True
-        except re.error:
-            pass
+        return self._has_ticker(query, query_lower)
 
-        return False
+    def _has_ticker(self, query: str, query_lower: str) -> bool:
+        """Check for ticker-like runs of 2-5 uppercase letters"""
+        # A query with no uppercase characters can't contain one; skip the regex
+        if query == query_lower:
+            return False
+        return self._ticker_re.search(query) is not None
 
-    def determine_agents(self, user_query: str, tickers: List[str]) -> List[str]:
+    def scan_query(self, query: str) -> Tuple[List[str], List[str], bool]:
+        """Extract companies, tickers and finance relevance in a single pass"""
+        if not query or not isinstance(query, str):
+            return [], [], False
+
+        self._maybe_refresh_raw_data()
+        is_finance, companies = self._classify(query)
+        companies = list(companies)
+        return companies, self.map_to_tickers(companies), is_finance
+
+    def determine_agents(self, user_query: str, tickers: List[str],
+                         is_finance: Optional[bool] = None) -> List[str]:
         """Determine which agents to run based on query analysis"""
         try:
-            is_finance = self.is_finance_query(user_query)
+            # Callers that already ran scan_query pass its is_finance along
+            if is_finance is None:
+                is_finance = self.is_finance_query(user_query)
 
             if not is_finance:
                 return ["GeneralAgent"]
-            elif is_finance and tickers:
+            elif tickers:
                 # Full financial analysis with all agents
                 return ["FinanceAgent", "YahooAgent", "SECAgent", "RedditAgent", "GeneralAgent"]
             else:
@@ -152,36 +292,18 @@ class LlamaIndexRouter:
     async def run_agent(self, agent_name: str, mcp_request: MCPRequest) -> Optional[Any]:
         """Run a specific agent with error handling"""
         try:
-            # Dynamic import to avoid circular dependencies
-            if agent_name == "GeneralAgent":
-                from general_agent import GeneralAgent
-                agent = GeneralAgent()
-                return agent.run(mcp_request)
-
-            elif agent_name == "FinanceAgent":
-                from finance_agent import FinanceAgent
-                agent = FinanceAgent()
-                return agent.run(mcp_request)
-
-            elif agent_name == "YahooAgent":
-                from yahoo_agent import YahooAgent
-                agent = YahooAgent()
-                return agent.run(mcp_request)
-
-            elif agent_name == "SECAgent":
-                from sec_agent import SECAgent
-                agent = SECAgent()
-                return agent.run(mcp_request)
-
-            elif agent_name == "RedditAgent":
-                from reddit_agent import RedditAgent
-                agent = RedditAgent()
-                return agent.run(mcp_request)
-
-            else:
+            if agent_name not in _AGENT_MODULES:
                 self.monitor.log_error("LlamaIndexRouter", f"Unknown agent: {agent_name}")
                 return {"error": f"Agent {agent_name} not found"}
 
+            agent_cls = _get_agent_class(agent_name)
+            if inspect.iscoroutinefunction(agent_cls.run):
+                return await agent_cls().run(mcp_request)
+
+            # Sync agents block on network I/O; run them in a worker thread so
+            # the agents gathered in route() actually overlap
+            return await asyncio.to_thread(lambda: agent_cls().run(mcp_request))
+
         except ImportError as e:
             error_msg = f"Import error for {agent_name}: {e}"
             self.monitor.log_error("LlamaIndexRouter", error_msg)
@@ -194,19 +316,21 @@ class LlamaIndexRouter:
 
     async def route(self, mcp_request: MCPRequest) -> MCPResponse:
         """Main routing logic for processing requests"""
-        start_time = datetime.now()
+        # Wall clock sampled once; durations come from the monotonic clock
+        start_wall = time.time()
+        start_ns = time.monotonic_ns()
         user_query = mcp_request.context.user_query if mcp_request.context else ""
 
         try:
             # Extract companies and tickers
-            companies = self.extract_companies(user_query)
-            tickers = self.map_to_tickers(companies)
+            companies, tickers, is_finance = self.scan_query(user_query)
 
             # Determine which agents to run
-            agent_names = self.determine_agents(user_query, tickers)
+            agent_names = self.determine_agents(user_query, tickers, is_finance)
 
             # Update context
-            updated_context = MCPContext(
+            # Inputs were produced above, so skip pydantic validation
+            updated_context = MCPContext.model_construct(
                 user_query=user_query,
                 companies=companies,
                 tickers=tickers,
@@ -214,7 +338,7 @@ class LlamaIndexRouter:
                 version=getattr(mcp_request.context, "version", "1.0")
             )
 
-            updated_request = MCPRequest(
+            updated_request = MCPRequest.model_construct(
                 request_id=mcp_request.request_id,
                 context=updated_context
             )
@@ -222,7 +346,7 @@ class LlamaIndexRouter:
             # Log routing decision
             routing_log = {
                 "router": "LlamaIndexRouter",
-                "timestamp": start_time.isoformat(),
+                "timestamp": start_wall,
                 "query": user_query,
                 "companies": companies,
                 "tickers": tickers,
@@ -244,7 +368,7 @@ class LlamaIndexRouter:
             overall_status = "success"
 
             for agent_name, result in zip(agent_names, results):
-                agent_key = agent_name.lower().replace("agent", "")
+                agent_key = AGENT_KEYS[agent_name]
 
                 if isinstance(result, Exception):
                     responses[agent_key] = {"error": str(result)}
@@ -263,28 +387,27 @@ class LlamaIndexRouter:
                     else:
                         responses[agent_key] = {"response": str(result)}
 
-            completed_time = datetime.now()
+            completed_wall = start_wall + (time.monotonic_ns() - start_ns) / 1e9
 
             # Update routing log
             routing_log.update({
-                "completed_timestamp": completed_time.isoformat(),
+                "completed_timestamp": completed_wall,
                 "status": overall_status,
                 "agents_completed": len(responses)
             })
 
             # Log results
             try:
-                with open("monitor_logs.json", "a") as f:
-                    f.write(json.dumps(routing_log) + "\n")
+                _enqueue_routing_log(routing_log)
             except Exception as e:
                 self.monitor.log_error("LlamaIndexRouter", f"Logging error: {e}")
 
-            return MCPResponse(
+            return MCPResponse.model_construct(
                 request_id=mcp_request.request_id,
                 data=responses,
                 context_updates=context_updates,
                 status=overall_status,
-                timestamp=completed_time
+                timestamp=datetime.fromtimestamp(completed_wall)
             )
 
         except Exception as e:
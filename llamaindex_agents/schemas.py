@@ -1,8 +1,13 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+# Internally built instances can skip validation via model_construct()
+_MCP_MODEL_CONFIG = ConfigDict(extra='ignore', validate_assignment=False)
+
 class MCPContext(BaseModel):
+    model_config = _MCP_MODEL_CONFIG
+
     user_query: str = ""
     companies: List[str] = Field(default_factory=list)
     tickers: List[str] = Field(default_factory=list)
@@ -10,10 +15,14 @@ class MCPContext(BaseModel):
     version: str = "1.0"
 
 class MCPRequest(BaseModel):
+    model_config = _MCP_MODEL_CONFIG
+
     request_id: str = Field(default_factory=lambda: str(datetime.now().timestamp()))
     context: MCPContext
 
 class MCPResponse(BaseModel):
+    model_config = _MCP_MODEL_CONFIG
+
     request_id: str
     data: Dict[str, Any] = Field(default_factory=dict)
     context_updates: Optional[Dict[str, Any]] = Field(default_factory=dict)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the FinanceAgentsWorkflow event flow with stub agents
+"""
+
+import asyncio
+import sys
+import os
+import types
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import workflow_design
+from workflow_design import FinanceAgentsWorkflow
+from schemas import MCPResponse
+
+
+class StubAgent:
+    """An agent that answers every request with fixed data"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def run(self, request):
+        return MCPResponse(request_id=request.request_id, data=self.data)
+
+
+def run_workflow(workflow, query):
+    """Run the workflow to completion; it must be started inside a running loop"""
+    async def run():
+        return await workflow.run(user_query=query)
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Replace main's LLM helpers, recording what each was called with"""
+    calls = {"improve": [], "summary": []}
+
+    async def improve_agent_response(agent, content):
+        calls["improve"].append(agent)
+        return f"improved {agent}"
+
+    async def generate_comprehensive_summary(query, all_agent_data, improved_responses):
+        calls["summary"].append(improved_responses)
+        return "combined summary"
+
+    main = types.ModuleType("main")
+    main.improve_agent_response = improve_agent_response
+    main.generate_comprehensive_summary = generate_comprehensive_summary
+    monkeypatch.setitem(sys.modules, "main", main)
+    return calls
+
+
+@pytest.fixture
+def workflow(monkeypatch):
+    """A workflow whose agents are all stubs"""
+    monkeypatch.setattr(workflow_design, "_AGENT_SINGLETONS", {
+        "FinanceAgent": StubAgent({"finance": {"answer": "10-K figures"}}),
+        "YahooAgent": StubAgent({"yahoo": [{"ticker": "AAPL"}]}),
+        "RedditAgent": StubAgent({"reddit": {"posts": []}}),
+        "SECAgent": StubAgent({"sec": {"filings": []}}),
+        "GeneralAgent": StubAgent({"general": {"response": "It is sunny."}}),
+    })
+    return FinanceAgentsWorkflow(timeout=30)
+
+
+def test_single_agent_summary_is_its_improved_response(workflow, llm_calls):
+    """A lone general answer becomes the final summary without any LLM call"""
+    result = run_workflow(workflow, "what is the weather today")
+
+    assert result["metadata"]["successful_agents"] == ["GeneralAgent"]
+    assert result["results"]["general"] == {"summary": "It is sunny."}
+    assert result["results"]["FinalSummary"] == {"summary": "It is sunny."}
+    assert llm_calls == {"improve": [], "summary": []}
+
+
+def test_multi_agent_summary_uses_improved_responses(workflow, llm_calls):
+    """The summary step only sees the improved results, never raw agent data"""
+    result = run_workflow(workflow, "apple stock price")
+
+    assert len(result["metadata"]["successful_agents"]) == 5
+    assert sorted(llm_calls["improve"]) == ["finance", "reddit", "sec", "yahoo"]
+    assert len(llm_calls["summary"]) == 1
+    assert llm_calls["summary"][0]["yahoo"] == {"summary": "improved yahoo"}
+    assert result["results"]["yahoo"] == {"summary": "improved yahoo"}
+    assert result["results"]["general"] == {"summary": "It is sunny."}
+    assert result["results"]["FinalSummary"] == {"summary": "combined summary"}
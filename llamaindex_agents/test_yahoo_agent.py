@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for YahooAgent's bulk price fetch against a stubbed yf.download
+"""
+
+import asyncio
+import sys
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import yahoo_agent
+from yahoo_agent import YahooAgent
+from schemas import MCPContext, MCPRequest
+
+DATES = pd.date_range("2024-01-01", periods=5, freq="D")
+
+
+def _download_frame(closes_by_ticker):
+    """Build a frame shaped like yf.download(group_by="ticker") output"""
+    return pd.concat(
+        {ticker: pd.DataFrame({"Open": closes, "Close": closes}) for ticker, closes in closes_by_ticker.items()},
+        axis=1
+    )
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """A YahooAgent with no LLM client, no monitor log and empty caches"""
+    monkeypatch.setenv("MONITOR_ENABLED", "0")
+    monkeypatch.setattr(yahoo_agent, "OpenAI", lambda **kwargs: None)
+    YahooAgent.clear_cache()
+    yield YahooAgent()
+    YahooAgent.clear_cache()
+
+
+def test_bulk_fetch_cold_cache(agent, monkeypatch):
+    """Every ticker comes from one download, and a repeat call is served from cache"""
+    calls = []
+
+    def fake_download(**kwargs):
+        calls.append(kwargs)
+        return _download_frame({
+            "AAPL": pd.Series([100.0, 101.0, 102.0, 103.0, 104.0], index=DATES),
+            "MSFT": pd.Series([200.0, 202.0, 204.0, 206.0, 208.0], index=DATES),
+        })
+
+    monkeypatch.setattr(yahoo_agent.yf, "download", fake_download)
+
+    results = agent._fetch_stock_data_bulk(["AAPL", "MSFT"])
+
+    assert len(calls) == 1
+    assert calls[0]["tickers"] == "AAPL MSFT"
+    assert calls[0]["period"] == "1mo"
+    assert "start" not in calls[0]
+    assert results["AAPL"]["statistics"]["last_close"] == 104.0
+    assert results["AAPL"]["statistics"]["percent_change_30d"] == pytest.approx(4.0)
+    assert results["MSFT"]["statistics"]["min_close"] == 200.0
+    assert results["MSFT"]["data_points"] == 5
+
+    assert agent._fetch_stock_data_bulk(["AAPL", "MSFT"]) == results
+    assert len(calls) == 1
+
+
+def test_bulk_fetch_stale_cache_extends_history(agent, monkeypatch):
+    """A stale history only downloads the days since its last completed close"""
+    frames = [
+        _download_frame({"AAPL": pd.Series([100.0, 101.0, 102.0, 103.0, 104.0], index=DATES)}),
+        # The last completed close is refetched to check the adjustments, the
+        # last cached day (it may have been intraday) is replaced, plus one new day
+        _download_frame({"AAPL": pd.Series([103.0, 105.0, 110.0], index=DATES[-2:].append(pd.DatetimeIndex(["2024-01-06"])))}),
+    ]
+    calls = []
+
+    def fake_download(**kwargs):
+        calls.append(kwargs)
+        return frames[len(calls) - 1]
+
+    monkeypatch.setattr(yahoo_agent.yf, "download", fake_download)
+    agent._fetch_stock_data_bulk(["AAPL"])
+
+    # Make every cached history stale
+    monkeypatch.setattr(yahoo_agent, "STOCK_DATA_TTL", -1)
+    results = agent._fetch_stock_data_bulk(["AAPL"])
+
+    assert len(calls) == 2
+    assert calls[1]["start"] == "2024-01-04"
+    assert "period" not in calls[1]
+    stats = results["AAPL"]["statistics"]
+    assert results["AAPL"]["data_points"] == 6
+    assert stats["last_close"] == 110.0
+    assert stats["max_close"] == 110.0
+    assert stats["percent_change_30d"] == pytest.approx(10.0)
+
+
+def test_bulk_fetch_refetches_readjusted_history(agent, monkeypatch):
+    """A split between fetches re-adjusts old closes, so the full period is fetched again"""
+    frames = [
+        _download_frame({"AAPL": pd.Series([100.0, 101.0, 102.0, 103.0, 104.0], index=DATES)}),
+        # After a 2:1 split every earlier close is halved
+        _download_frame({"AAPL": pd.Series([51.5, 52.5, 55.0], index=DATES[-2:].append(pd.DatetimeIndex(["2024-01-06"])))}),
+        _download_frame({"AAPL": pd.Series([50.0, 50.5, 51.0, 51.5, 52.5, 55.0], index=DATES.append(pd.DatetimeIndex(["2024-01-06"])))}),
+    ]
+    calls = []
+
+    def fake_download(**kwargs):
+        calls.append(kwargs)
+        return frames[len(calls) - 1]
+
+    monkeypatch.setattr(yahoo_agent.yf, "download", fake_download)
+    agent._fetch_stock_data_bulk(["AAPL"])
+
+    monkeypatch.setattr(yahoo_agent, "STOCK_DATA_TTL", -1)
+    results = agent._fetch_stock_data_bulk(["AAPL"])
+
+    assert len(calls) == 3
+    assert calls[2]["period"] == "1mo"
+    stats = results["AAPL"]["statistics"]
+    assert results["AAPL"]["data_points"] == 6
+    assert stats["min_close"] == 50.0
+    assert stats["percent_change_30d"] == pytest.approx(10.0)
+
+
+def test_single_ticker_fetch_shares_the_bulk_cache(agent, monkeypatch):
+    """_fetch_stock_data goes through the bulk path and its cache"""
+    calls = []
+
+    def fake_download(**kwargs):
+        calls.append(kwargs)
+        return _download_frame({"AAPL": pd.Series([100.0, 101.0, 102.0, 103.0, 104.0], index=DATES)})
+
+    monkeypatch.setattr(yahoo_agent.yf, "download", fake_download)
+
+    assert agent._fetch_stock_data("AAPL") == agent._fetch_stock_data_bulk(["AAPL"])["AAPL"]
+    assert len(calls) == 1
+
+
+STATS = {"last_close": 227.48, "volatility_annualized": 21.5, "percent_change_30d": -3.2}
+
+
+@pytest.mark.parametrize("query, answer", [
+    ("What's the current price of AAPL?", "Current price: $227.48"),
+    ("AAPL price", "Current price: $227.48"),
+    ("What is Apple's stock price?", "Current price: $227.48"),
+    ("What's the 30-day return for MSFT?", "30-day change: -3.20%"),
+    ("TSLA volatility", "Annualized volatility: 21.50%"),
+    # Anything beyond a single plain statistic goes to the LLM
+    ("What is Apple's price-to-earnings ratio?", None),
+    ("What's Apple's return on equity?", None),
+    ("Tell me about Apple's stock price and whether it's a good investment", None),
+    ("What is the target price for NVDA?", None),
+    ("Should I buy AAPL at this price?", None),
+])
+def test_try_answer_locally(agent, query, answer):
+    assert agent._try_answer_locally(STATS, query) == answer
+
+
+def test_try_answer_locally_leaves_nan_to_llm(agent):
+    assert agent._try_answer_locally({**STATS, "volatility_annualized": float("nan")}, "TSLA volatility") is None
+
+
+def test_locally_answered_tickers_prefetch_info_off_the_loop(agent, monkeypatch):
+    """Company info is resolved in worker threads even when no LLM call is made"""
+    monkeypatch.setattr(yahoo_agent.yf, "download", lambda **kwargs: _download_frame({
+        "AAPL": pd.Series([100.0, 101.0, 102.0, 103.0, 104.0], index=DATES),
+        "MSFT": pd.Series([200.0, 202.0, 204.0, 206.0, 208.0], index=DATES),
+    }))
+    lookups = {}
+
+    def fake_ticker_info(ticker):
+        lookups[ticker] = threading.current_thread()
+        return {"company_name": f"{ticker} Inc.", "sector": "Technology", "market_cap": 1}
+
+    monkeypatch.setattr(agent, "_get_ticker_info", fake_ticker_info)
+    request = MCPRequest(context=MCPContext(user_query="price", tickers=["AAPL", "MSFT"]))
+
+    response = asyncio.run(agent._arun(request))
+
+    assert response.status == "success"
+    assert [entry["company_name"] for entry in response.data["yahoo"]] == ["AAPL Inc.", "MSFT Inc."]
+    assert [entry["llm_analysis"] for entry in response.data["yahoo"]] == ["Current price: $104.00", "Current price: $208.00"]
+    assert threading.main_thread() not in lookups.values()
+
+
+def test_market_summary_volatility_matches_statistics_across_gaps(agent, monkeypatch):
+    """A row missing from one ticker doesn't change the other's returns or its own"""
+    aapl = pd.Series([100.0, 103.0, 99.0, 104.0, 101.0], index=DATES)
+    # MSFT has no close on the third day
+    msft = pd.Series([200.0, 206.0, 201.0, 212.0], index=DATES.delete(2))
+    monkeypatch.setattr(yahoo_agent.yf, "download", lambda **kwargs: _download_frame({"AAPL": aapl, "MSFT": msft}))
+    monkeypatch.setattr(agent, "_get_ticker_info", lambda ticker: {"company_name": f"{ticker} Inc."})
+
+    summary = agent.get_market_summary(["AAPL", "MSFT"])["market_summary"]
+
+    assert [row["company"] for row in summary] == ["AAPL Inc.", "MSFT Inc."]
+    for row, closes in zip(summary, [aapl, msft]):
+        stats = agent._compute_statistics(row["ticker"], closes, "1mo")["statistics"]
+        assert row["volatility"] == pytest.approx(stats["volatility_annualized"])
+        assert row["last_price"] == stats["last_close"]
+        assert row["change_30d"] == pytest.approx(stats["percent_change_30d"])
@@ -7,9 +7,44 @@ into a more robust workflow-based architecture.
 
 from llama_index.core.workflow import Event, StartEvent, StopEvent, Workflow, step
 from llama_index.core.workflow.context import Context
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
 import asyncio
+import hashlib
+import importlib
+import inspect
+import orjson
 from datetime import datetime
+from schemas import MCPRequest, MCPContext
+from router import AGENT_KEYS
+from classifier import get_router
+
+# Agent key -> (module, class). Modules are imported when the agents are
+# initialized, so one agent with a missing dependency is skipped rather
+# than breaking the import of this module
+_AGENT_CLASSES = [
+    ("FinanceAgent", "finance_agent", "FinanceAgent"),
+    ("YahooAgent", "yahoo_agent_enhanced", "YahooAgentEnhanced"),
+    ("RedditAgent", "reddit_agent", "RedditAgent"),
+    ("SECAgent", "sec_agent", "SECAgent"),
+    ("GeneralAgent", "general_agent", "GeneralAgent"),
+]
+# Agent instances shared by every workflow, so each agent's index, clients
+# and sessions are built once per process rather than once per workflow
+_AGENT_SINGLETONS: Dict[str, Any] = {}
+
+def _lru_get(cache: OrderedDict, key):
+    """Return a cached value (or None), marking it most recently used"""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+def _lru_put(cache: OrderedDict, key, value, cap: int):
+    """Store a value, evicting the least recently used entry past cap"""
+    cache[key] = value
+    if len(cache) > cap:
+        cache.popitem(last=False)
 
 # Define Events for the workflow
 class QueryAnalyzedEvent(Event):
@@ -33,6 +68,12 @@ class AllAgentsCompletedEvent(Event):
     successful_agents: List[str]
     failed_agents: List[str]
 
+class ResponsesImprovedEvent(Event):
+    """Event fired after agent responses are improved"""
+    results: Dict[str, Any]
+    successful_agents: List[str]
+    failed_agents: List[str]
+
 class SummaryGeneratedEvent(Event):
     """Event fired after final summary is generated"""
     summary: str
@@ -50,44 +91,54 @@ class FinanceAgentsWorkflow(Workflow):
     5. Return final response
     """
 
-    def __init__(self, **kwargs):
+    # (agent name, content digest) -> LLM-improved content
+    _improve_cache: "OrderedDict[Tuple[str, bytes], str]" = OrderedDict()
+    _improve_cache_cap = 512
+
+    def __init__(self, agent_timeout: Optional[float] = None, max_parallel_agents: int = 5, **kwargs):
         super().__init__(**kwargs)
+        self.workflow_timeout = kwargs.get("timeout")
+        self.max_parallel_agents = max_parallel_agents
+        # Per-agent budget so one slow agent can't stretch the whole run
+        # towards the workflow timeout
+        workflow_timeout = self.workflow_timeout or 300
+        self.agent_timeout = agent_timeout or max(10, workflow_timeout // 3)
         self.agent_instances = {}
         self._initialize_agents()
+        self._setup_routing_data()
+
+    def _setup_routing_data(self):
+        """Share the process-wide router so its compiled patterns are reused"""
+        self.router = get_router()
 
     def _initialize_agents(self):
         """Initialize all agent instances"""
-        try:
-            from finance_agent import FinanceAgent
-            from yahoo_agent_enhanced import YahooAgentEnhanced
-            from reddit_agent import RedditAgent
-            from sec_agent import SECAgent
-            from general_agent import GeneralAgent
-
-            self.agent_instances = {
-                "FinanceAgent": FinanceAgent(),
-                "YahooAgent": YahooAgentEnhanced(),
-                "RedditAgent": RedditAgent(),
-                "SECAgent": SECAgent(),
-                "GeneralAgent": GeneralAgent()
-            }
-        except Exception as e:
-            print(f"Error initializing agents: {e}")
+        for key, module_name, class_name in _AGENT_CLASSES:
+            try:
+                agent = _AGENT_SINGLETONS.get(key)
+                if agent is None:
+                    cls = getattr(importlib.import_module(module_name), class_name)
+                    agent = _AGENT_SINGLETONS.setdefault(key, cls())
+                self.agent_instances[key] = agent
+            except Exception as e:
+                print(f"Error initializing {key}: {e}")
+
+    def _analyze(self, user_query: str) -> Tuple[List[str], List[str], bool, List[str]]:
+        """Analyze a query into companies, tickers, finance relevance and agents"""
+        # Repeats are served by the router's classification memo, which is
+        # cleared whenever the raw data keywords are reloaded
+        router = self.router
+        companies, tickers, is_finance = router.scan_query(user_query)
+        selected_agents = router.determine_agents(user_query, tickers, is_finance)
+        return companies, tickers, is_finance, selected_agents
 
     @step
     async def analyze_query(self, ctx: Context, ev: StartEvent) -> QueryAnalyzedEvent:
         """Step 1: Analyze the incoming query"""
         user_query = ev.get("user_query", "")
 
-        # Import router logic for query analysis
-        from router import LlamaIndexRouter
-        router = LlamaIndexRouter()
-
         # Extract companies and tickers
-        companies = router.extract_companies(user_query)
-        tickers = router.map_to_tickers(companies)
-        is_finance = router.is_finance_query(user_query)
-        selected_agents = router.determine_agents(user_query, tickers)
+        companies, tickers, is_finance, selected_agents = self._analyze(user_query)
 
         print(f"🔍 Query Analysis:")
         print(f"  Companies: {companies}")
@@ -115,8 +166,6 @@ class FinanceAgentsWorkflow(Workflow):
     @step
     async def run_agents_parallel(self, ctx: Context, ev: QueryAnalyzedEvent) -> AllAgentsCompletedEvent:
         """Step 2: Run all selected agents in parallel"""
-        from schemas import MCPRequest, MCPContext
-
         # Create MCP request
         mcp_context = MCPContext(
             user_query=ev.user_query,
@@ -125,6 +174,9 @@ class FinanceAgentsWorkflow(Workflow):
         )
         request = MCPRequest(context=mcp_context)
 
+        # Caps concurrent agents so downstream APIs aren't overwhelmed
+        agent_semaphore = asyncio.Semaphore(self.max_parallel_agents)
+
         # Run agents in parallel
         async def run_single_agent(agent_name: str) -> AgentCompletedEvent:
             try:
@@ -138,11 +190,13 @@ class FinanceAgentsWorkflow(Workflow):
                         error=f"Agent {agent_name} not found"
                     )
 
-                # Run the agent
-                if agent_name == "RedditAgent":
-                    result = agent.run(request)  # Sync call
-                else:
-                    result = agent.run(request)  # All are sync now
+                # Run the agent; sync agents block on network I/O, so they run
+                # in worker threads to actually overlap
+                async with agent_semaphore:
+                    if inspect.iscoroutinefunction(agent.run):
+                        result = await agent.run(request)
+                    else:
+                        result = await asyncio.to_thread(agent.run, request)
 
                 print(f"✅ {agent_name} completed successfully")
                 return AgentCompletedEvent(
@@ -160,22 +214,44 @@ class FinanceAgentsWorkflow(Workflow):
                     error=str(e)
                 )
 
+        async def run_with_budget(agent_name: str) -> AgentCompletedEvent:
+            try:
+                return await asyncio.wait_for(run_single_agent(agent_name), self.agent_timeout)
+            except asyncio.TimeoutError:
+                print(f"⏱️ {agent_name} timed out after {self.agent_timeout}s")
+                return AgentCompletedEvent(
+                    agent_name=agent_name,
+                    result={},
+                    success=False,
+                    error=f"Timed out after {self.agent_timeout}s"
+                )
+
         # Run all agents in parallel
-        agent_tasks = [run_single_agent(agent) for agent in ev.selected_agents]
-        agent_events = await asyncio.gather(*agent_tasks)
+        agent_tasks = [run_with_budget(agent) for agent in ev.selected_agents]
+        gathered = await asyncio.gather(*agent_tasks, return_exceptions=True)
+        agent_events = [
+            event if not isinstance(event, BaseException) else AgentCompletedEvent(
+                agent_name=agent_name,
+                result={},
+                success=False,
+                error=str(event)
+            )
+            for agent_name, event in zip(ev.selected_agents, gathered)
+        ]
 
         # Collect results
-        results = {}
-        successful_agents = []
-        failed_agents = []
-
-        for event in agent_events:
-            if event.success:
-                results[event.agent_name.lower()] = event.result
-                successful_agents.append(event.agent_name)
-            else:
-                failed_agents.append(event.agent_name)
-                print(f"⚠️ {event.agent_name} failed: {event.error}")
+        # Canonical short keys ("finance", "yahoo", ...) match AGENT_TIPS and
+        # the summary builder, so no later step re-derives them
+        results = {
+            AGENT_KEYS.get(e.agent_name, e.agent_name.lower()): e.result
+            for e in agent_events if e.success
+        }
+        successful_agents = [e.agent_name for e in agent_events if e.success]
+        failed_events = [e for e in agent_events if not e.success]
+        failed_agents = [e.agent_name for e in failed_events]
+
+        for event in failed_events:
+            print(f"⚠️ {event.agent_name} failed: {event.error}")
 
         # Store in context
         await ctx.set("agent_results", results)
@@ -188,54 +264,93 @@ class FinanceAgentsWorkflow(Workflow):
             failed_agents=failed_agents
         )
 
+    @staticmethod
+    def _passthrough_summary(result: Any) -> str:
+        """Extract the response text of an agent result that skips the LLM rewrite"""
+        if isinstance(result, dict):
+            data = result.get("general", result)
+            if isinstance(data, dict) and data.get("response"):
+                return data["response"]
+            return orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
+        return str(result)
+
     @step
-    async def improve_responses(self, ctx: Context, ev: AllAgentsCompletedEvent) -> AllAgentsCompletedEvent:
+    async def improve_responses(self, ctx: Context, ev: AllAgentsCompletedEvent) -> ResponsesImprovedEvent:
         """Step 3: Improve individual agent responses"""
-        improved_results = {}
-
         # Import improvement function
         import sys
         import os
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
         from main import improve_agent_response
 
-        for agent_name, result in ev.results.items():
+        async def improve_single_response(agent_name: str, result: Any) -> Dict[str, Any]:
             try:
-                if not result or (isinstance(result, dict) and result.get("error")):
-                    continue
-
                 print(f"🔧 Improving {agent_name} response...")
 
                 # Convert to string for LLM processing
                 if isinstance(result, dict):
-                    content = json.dumps(result, ensure_ascii=False, indent=2)
+                    content = orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
                 else:
                     content = str(result)
 
-                improved_content = await improve_agent_response(agent_name, content)
-                improved_results[agent_name] = {"summary": improved_content}
+                # Identical agent output gets the identical rewrite, so skip the LLM
+                cache_key = (agent_name, hashlib.blake2b(content.encode(), digest_size=16).digest())
+                improved_content = _lru_get(self._improve_cache, cache_key)
+                if improved_content is None:
+                    improved_content = await improve_agent_response(agent_name, content)
+                    # Unchanged content means the LLM call fell back; don't pin that
+                    if improved_content != content:
+                        _lru_put(self._improve_cache, cache_key, improved_content, self._improve_cache_cap)
+                return {"summary": improved_content}
 
             except Exception as e:
                 print(f"⚠️ Failed to improve {agent_name} response: {e}")
                 # Keep original response
-                improved_results[agent_name] = {"summary": str(result)}
+                return {"summary": str(result)}
+
+        usable_results = {
+            agent_name: result for agent_name, result in ev.results.items()
+            if result and not (isinstance(result, dict) and result.get("error"))
+        }
+
+        # The general agent already answers in prose, so it skips the LLM rewrite;
+        # the others are rewritten concurrently
+        needs_llm = [name for name in usable_results if name != "general"]
+        improved = await asyncio.gather(
+            *(improve_single_response(name, usable_results[name]) for name in needs_llm)
+        )
+        rewritten = dict(zip(needs_llm, improved))
+
+        improved_results = {
+            agent_name: rewritten[agent_name] if agent_name in rewritten
+            else {"summary": self._passthrough_summary(result)}
+            for agent_name, result in usable_results.items()
+        }
 
         # Update context
         await ctx.set("improved_results", improved_results)
 
-        return AllAgentsCompletedEvent(
+        return ResponsesImprovedEvent(
             results=improved_results,
             successful_agents=ev.successful_agents,
             failed_agents=ev.failed_agents
         )
 
     @step
-    async def generate_final_summary(self, ctx: Context, ev: AllAgentsCompletedEvent) -> SummaryGeneratedEvent:
+    async def generate_final_summary(self, ctx: Context, ev: ResponsesImprovedEvent) -> SummaryGeneratedEvent:
         """Step 4: Generate comprehensive final summary"""
         user_query = await ctx.get("user_query")
         original_results = await ctx.get("agent_results")
         improved_results = ev.results
 
+        # Nothing to synthesize across a single response; reuse it as the summary
+        if len(improved_results) <= 1:
+            summary = next(iter(improved_results.values()), {}).get("summary", "")
+            return SummaryGeneratedEvent(
+                summary=summary,
+                complete_results={**improved_results, "FinalSummary": {"summary": summary}}
+            )
+
         # Import summary generation function
         from main import generate_comprehensive_summary
 
@@ -285,12 +400,21 @@ class FinanceAgentsWorkflow(Workflow):
             }
         })
 
+# Shared workflow reused across queries; all per-query state lives in the
+# workflow Context, so one instance can serve concurrent runs
+_WORKFLOW_SINGLETON: Optional[FinanceAgentsWorkflow] = None
+
 # Example usage function
-async def run_financeagents_workflow(user_query: str) -> Dict[str, Any]:
+async def run_financeagents_workflow(user_query: str, timeout: float = 300) -> Dict[str, Any]:
     """
     Run the FinanceAgents workflow for a given query
     """
-    workflow = FinanceAgentsWorkflow(timeout=300)  # 5 minute timeout
+    global _WORKFLOW_SINGLETON
+    # Construction is synchronous, so no await can interleave between the
+    # check and the assignment and no lock is needed
+    if _WORKFLOW_SINGLETON is None or _WORKFLOW_SINGLETON.workflow_timeout != timeout:
+        _WORKFLOW_SINGLETON = FinanceAgentsWorkflow(timeout=timeout)  # 5 minute timeout by default
+    workflow = _WORKFLOW_SINGLETON
 
     result = await workflow.run(user_query=user_query)
     return result
\ No newline at end of file
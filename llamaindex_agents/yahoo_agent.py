@@ -1,108 +1,489 @@
+import os
+import re
+import math
+import asyncio
+import hashlib
+import threading
+import time
 import yfinance as yf
+import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import json
-from typing import List, Dict, Any
+import orjson
+from typing import List, Dict, Any, Optional, Tuple
+from llama_index.core.llms import ChatMessage
 from llama_index.llms.openai import OpenAI
 from schemas import MCPRequest, MCPResponse
 from monitor import MonitorAgent
 
+# Upper bound on concurrent per-ticker lookups and LLM calls; all are I/O bound
+MAX_CONCURRENCY = int(os.getenv("YAHOO_AGENT_CONCURRENCY", "16"))
+# Symbols per yf.download() call, within Yahoo's URL length limit
+BULK_CHUNK_SIZE = 20
+# Seconds before cached price history and company metadata go stale
+STOCK_DATA_TTL = 300
+TICKER_INFO_TTL = 24 * 60 * 60
+# Seconds a stale price history is kept as the base for an incremental fetch
+HISTORY_RETENTION = 24 * 60 * 60
+# Calendar window of each period, for trimming incrementally extended
+# histories; other periods are always refetched in full
+_PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+}
+# Seconds an LLM analysis is reused for identical data and query
+ANALYSIS_TTL = 30 * 60
+
+# Fixed analyst instructions, sent as the system message so only the
+# per-ticker data varies between requests
+_SYSTEM_PROMPT = """As a financial analyst, analyze the 30-day stock data you are given as JSON and respond to the user's query ("query").
+Prices are in USD; percent_change_30d and volatility_annualized are percentages.
+
+Please provide:
+1. A brief analysis of the stock's recent performance
+2. Notable trends or patterns
+3. Risk assessment based on volatility
+4. Any relevant insights related to the user's specific query
+
+Keep the response concise and professional."""
+
+# Several tickers share one completion; answers come back as a JSON object
+_BATCH_SYSTEM_PROMPT = _SYSTEM_PROMPT + """
+
+The JSON lists several stocks under "stocks". Analyze each one separately and reply with a JSON object {"analyses": [...]} holding one analysis string per stock, in the same order."""
+
+def _sample_std(values: np.ndarray, mean: float) -> float:
+    """Sample (ddof=1) standard deviation around an already computed mean"""
+    # Two-pass like ndarray.std, but the mean pass is shared with the caller
+    deviations = values - mean
+    return float(np.sqrt(deviations @ deviations / (values.shape[0] - 1)))
+
+def _ttl_get(cache: OrderedDict, key, ttl: float):
+    """Return a cached value younger than ttl (or None), marking it most recently used"""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    value, stored_at = entry
+    if time.monotonic() - stored_at > ttl:
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return value
+
+def _ttl_put(cache: OrderedDict, key, value, cap: int):
+    """Store a timestamped value, evicting the least recently used entry past cap"""
+    cache[key] = (value, time.monotonic())
+    cache.move_to_end(key)
+    if len(cache) > cap:
+        cache.popitem(last=False)
+
+def _plain_question(metric: str) -> re.Pattern:
+    """Match a query that asks for the given metric and nothing else"""
+    # e.g. "AAPL price", "What is Apple's stock price?", "the current price of MSFT";
+    # a bare leading subject must be an uppercase ticker so "target price" etc. don't match
+    return re.compile(
+        r"^\s*(?:(?:what(?:'s|\s+is)|show(?:\s+me)?)\s+)?(?:the\s+)?"
+        r"(?:(?-i:[A-Z]{1,5})\s+|[\w.&-]+'s\s+)?"
+        r"(?:current\s+|latest\s+)?" + metric +
+        r"(?:\s+(?:of|for)\s+[\w.&-]+(?:\s+stock)?)?\s*\??\s*$",
+        re.I
+    )
+
 class YahooAgent:
+    # Shared across instances (the router builds a new agent per request)
+    # and guarded by one lock since tickers are processed in worker threads
+    _history_cache = OrderedDict()
+    _ticker_info_cache = OrderedDict()
+    _analysis_cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_cap = 512
+    _analysis_cache_cap = 2048
+
+    # Queries that ask for nothing but one statistic, answered straight from
+    # it; the patterns are anchored, so anything more goes to the LLM
+    _LOCAL_ANSWERS = (
+        (_plain_question(r"(?:stock\s+|share\s+)?(?:price|close|closing\s+price|last\s+close)"),
+         "last_close", "Current price: ${:.2f}"),
+        (_plain_question(r"(?:annuali[sz]ed\s+)?volatility"),
+         "volatility_annualized", "Annualized volatility: {:.2f}%"),
+        (_plain_question(r"(?:30[- ]day\s+)?(?:price\s+)?(?:change|return)"),
+         "percent_change_30d", "30-day change: {:.2f}%"),
+    )
+
     def __init__(self):
         self.monitor = MonitorAgent()
-        self.llm = OpenAI(model="gpt-3.5-turbo", temperature=0.1)
+        self._log_health = self.monitor.log_health
+        self._log_error = self.monitor.log_error
+        # run() starts a fresh event loop per call, so an async client cached
+        # on the LLM would be bound to a closed loop on the next call
+        self.llm = OpenAI(model="gpt-3.5-turbo", temperature=0.1, reuse_client=False)
 
     def _fetch_stock_data(self, ticker: str, period: str = "1mo") -> Dict[str, Any]:
         """Fetch stock data for a given ticker"""
-        try:
-            stock = yf.Ticker(ticker)
-            data = stock.history(period=period)
+        return self._fetch_stock_data_bulk([ticker], period)[ticker]
 
-            if data.empty:
-                return {"error": f"No data found for {ticker}"}
+    def _fetch_stock_data_bulk(self, tickers: List[str], period: str = "1mo") -> Dict[str, Dict[str, Any]]:
+        """Fetch stock data for several tickers with one download per chunk"""
+        results = {}
+        stale = {}
+        missing = []
+        for ticker in tickers:
+            cached = self._get_cached_history(ticker, period)
+            # Extending a stale history needs a completed close to check it
+            # against, so one-bar histories are refetched in full
+            if cached is None or (not cached[1] and (period not in _PERIOD_OFFSETS or len(cached[0]) < 2)):
+                missing.append(ticker)
+            elif cached[1]:
+                results[ticker] = self._compute_statistics(ticker, cached[0], period)
+            else:
+                stale[ticker] = cached[0]
 
-            # Calculate statistics
-            close_prices = data['Close']
-            min_price = float(close_prices.min())
-            max_price = float(close_prices.max())
-            mean_price = float(close_prices.mean())
-            last_close = float(close_prices.iloc[-1])
-            std_dev = float(close_prices.std())
+        # Stale histories only need the days since the oldest of them ends,
+        # from their last completed close on
+        if stale:
+            since = min(close_prices.index[-2] for close_prices in stale.values())
+            self._download_statistics(list(stale), period, results, {"start": since.strftime("%Y-%m-%d")}, stale)
 
-            # Calculate percentage change
-            pct_change = float(((close_prices.iloc[-1] - close_prices.iloc[0]) / close_prices.iloc[0]) * 100) if close_prices.iloc[0] != 0 else 0
+        # Tickers without a usable cached history are downloaded in full
+        self._download_statistics(missing, period, results, {"period": period})
+        return results
 
-            # Calculate annualized volatility
-            volatility = float(close_prices.pct_change().std() * (252 ** 0.5) * 100)
+    def _download_statistics(self, tickers: List[str], period: str, results: Dict[str, Dict[str, Any]],
+                             history_range: Dict[str, str],
+                             cached_histories: Optional[Dict[str, pd.Series]] = None):
+        """Download closes in chunks, extending any cached histories, and store each ticker's statistics"""
+        # history_range is passed to yf.download as-is: {"period": ...} for a
+        # full fetch or {"start": ...} for an incremental one
+        readjusted = []
+        for offset in range(0, len(tickers), BULK_CHUNK_SIZE):
+            chunk = tickers[offset:offset + BULK_CHUNK_SIZE]
+            try:
+                closes = self._download_close_prices(chunk, **history_range)
+            except Exception as e:
+                for ticker in chunk:
+                    results[ticker] = {"error": f"Failed to fetch data for {ticker}: {str(e)}"}
+                continue
 
-            # Get additional info
-            info = stock.info
-            company_name = info.get('longName', ticker)
-            sector = info.get('sector', 'Unknown')
-            market_cap = info.get('marketCap', 'Unknown')
+            for ticker in chunk:
+                try:
+                    close_prices = self._clean_closes(closes[ticker])
+                    if cached_histories:
+                        if not self._history_continues(cached_histories[ticker], close_prices):
+                            readjusted.append(ticker)
+                            continue
+                        close_prices = self._extend_history(cached_histories[ticker], close_prices, period)
+                    if close_prices.empty:
+                        results[ticker] = {"error": f"No data found for {ticker}"}
+                        continue
 
-            return {
-                "ticker": ticker,
-                "company_name": company_name,
-                "sector": sector,
-                "market_cap": market_cap,
-                "period": period,
-                "statistics": {
-                    "min_close": min_price,
-                    "max_close": max_price,
-                    "mean_close": mean_price,
-                    "std_dev_30d": std_dev,
-                    "percent_change_30d": pct_change,
-                    "volatility_annualized": volatility,
-                    "last_close": last_close
-                },
-                "data_points": len(data)
-            }
+                    self._cache_history(ticker, period, close_prices)
+                    results[ticker] = self._compute_statistics(ticker, close_prices, period)
+
+                except Exception as e:
+                    results[ticker] = {"error": f"Failed to fetch data for {ticker}: {str(e)}"}
 
+        # Yahoo re-adjusted these histories since they were cached, so the new
+        # closes can't be spliced onto them; fetch the whole period again
+        if readjusted:
+            self._download_statistics(readjusted, period, results, {"period": period})
+
+    def _download_close_prices(self, tickers: List[str], **history_range) -> pd.DataFrame:
+        """Download closing prices for up to BULK_CHUNK_SIZE tickers, one column per ticker"""
+        # auto_adjust matches Ticker.history(), so the closes agree with
+        # the adjusted prices Yahoo reports elsewhere
+        frame = yf.download(
+            tickers=" ".join(tickers), group_by="ticker",
+            threads=True, progress=False, auto_adjust=True, **history_range
+        )
+        # Nothing in the range at all (e.g. an incremental fetch on a holiday)
+        if frame.empty:
+            return pd.DataFrame(columns=tickers, dtype=np.float64)
+        # Columns are (ticker, field) pairs; older yfinance versions return
+        # flat columns for a single ticker
+        if isinstance(frame.columns, pd.MultiIndex):
+            return frame.xs('Close', axis=1, level=1)
+        return frame[['Close']].set_axis(tickers, axis=1)
+
+    def _clean_closes(self, close_prices: pd.Series) -> pd.Series:
+        """Drop missing closes and the timezone, so histories from either fetch path line up"""
+        close_prices = close_prices.dropna()
+        if getattr(close_prices.index, "tz", None) is not None:
+            close_prices = close_prices.tz_localize(None)
+        return close_prices
+
+    def _history_continues(self, cached: pd.Series, new: pd.Series) -> bool:
+        """Whether newly fetched closes carry the same price adjustments as a cached history"""
+        # A dividend or split makes Yahoo re-adjust every earlier close, which
+        # shows up as a different value for the last completed cached day
+        overlap = cached.index[-2]
+        return overlap in new.index and bool(np.isclose(new[overlap], cached[overlap], rtol=1e-5, atol=0))
+
+    def _extend_history(self, cached: pd.Series, new: pd.Series, period: str) -> pd.Series:
+        """Append newly fetched closes to a cached history and trim it to the period"""
+        if not new.empty:
+            # The last cached day may have been intraday; the new fetch replaces it
+            cached = pd.concat([cached[cached.index < new.index[0]], new])
+        return cached[cached.index > cached.index[-1] - _PERIOD_OFFSETS[period]]
+
+    def _get_ticker_info(self, ticker: str) -> Dict[str, Any]:
+        """Resolve descriptive company fields for a ticker, only when needed"""
+        # Name, sector and market cap rarely change, so they are kept far
+        # longer than prices; .info is the slowest Yahoo call we make
+        with self._cache_lock:
+            cached = _ttl_get(self._ticker_info_cache, ticker, TICKER_INFO_TTL)
+        if cached is not None:
+            return cached
+
+        try:
+            info = yf.Ticker(ticker).get_info()
         except Exception as e:
-            return {"error": f"Failed to fetch data for {ticker}: {str(e)}"}
+            # The fields are descriptive only; fall back rather than fail the ticker
+            self._log_error("YahooAgent", f"Info lookup failed for {ticker}: {e}")
+            return {"company_name": ticker, "sector": "Unknown", "market_cap": "Unknown"}
+
+        ticker_info = {
+            "company_name": info.get('longName', ticker),
+            "sector": info.get('sector', 'Unknown'),
+            "market_cap": info.get('marketCap', 'Unknown')
+        }
+        with self._cache_lock:
+            _ttl_put(self._ticker_info_cache, ticker, ticker_info, self._cache_cap)
+        return ticker_info
+
+    def _get_cached_history(self, ticker: str, period: str) -> Optional[Tuple[pd.Series, bool]]:
+        """Return cached closing prices and whether they are still fresh, or None on a miss"""
+        with self._cache_lock:
+            cached = _ttl_get(self._history_cache, (ticker, period), HISTORY_RETENTION)
+        if cached is None:
+            return None
+        close_prices, fetched_at = cached
+        return close_prices, time.monotonic() - fetched_at < STOCK_DATA_TTL
+
+    def _cache_history(self, ticker: str, period: str, close_prices: pd.Series):
+        """Store freshly fetched closing prices"""
+        with self._cache_lock:
+            _ttl_put(self._history_cache, (ticker, period), (close_prices, time.monotonic()), self._cache_cap)
+
+    @classmethod
+    def clear_cache(cls):
+        """Drop all cached price histories, company metadata and analyses"""
+        with cls._cache_lock:
+            cls._history_cache.clear()
+            cls._ticker_info_cache.clear()
+            cls._analysis_cache.clear()
+
+    def _compute_statistics(self, ticker: str, close_prices: pd.Series, period: str) -> Dict[str, Any]:
+        """Calculate price statistics from a series of closing prices"""
+        # Plain ndarray reductions skip pandas' per-call alignment and NaN
+        # handling; callers pass NaN-free prices
+        prices = close_prices.to_numpy(dtype=np.float64)
+        n = prices.shape[0]
+        min_price = float(prices.min())
+        max_price = float(prices.max())
+        mean_price = float(prices.mean())
+        last_close = float(prices[-1])
+        # Sample statistics, as pandas computed them; NaN when undefined
+        std_dev = _sample_std(prices, mean_price) if n > 1 else float("nan")
+
+        # Calculate percentage change
+        first_close = prices[0]
+        pct_change = float((last_close / first_close - 1) * 100) if first_close != 0 else 0
+
+        # Calculate annualized volatility from simple daily returns. A return
+        # is the price ratio minus 1, and the constant doesn't change the
+        # spread, so the ratios alone give the same std in one array op
+        if n > 2:
+            price_ratios = prices[1:] / prices[:-1]
+            volatility = float(price_ratios.std(ddof=1) * (252 ** 0.5) * 100)
+        else:
+            volatility = float("nan")
+
+        return {
+            "ticker": ticker,
+            "period": period,
+            "statistics": {
+                "min_close": min_price,
+                "max_close": max_price,
+                "mean_close": mean_price,
+                "std_dev_30d": std_dev,
+                "percent_change_30d": pct_change,
+                "volatility_annualized": volatility,
+                "last_close": last_close
+            },
+            "data_points": len(close_prices)
+        }
+
+    def _ticker_payload(self, stock_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the per-ticker data sent to the LLM"""
+        ticker_info = self._get_ticker_info(stock_data["ticker"])
+        return {
+            "ticker": stock_data["ticker"],
+            "company": ticker_info["company_name"],
+            "sector": ticker_info["sector"],
+            "market_cap": ticker_info["market_cap"],
+            # Full float precision (e.g. 227.47999572753906) only costs
+            # prompt tokens; four decimals is more than the analysis needs
+            "statistics": {name: round(value, 4) for name, value in stock_data["statistics"].items()}
+        }
+
+    def _analysis_key(self, payload: Dict[str, Any], user_query: str) -> str:
+        """Stable digest of everything an analysis depends on"""
+        raw = orjson.dumps({"p": payload, "q": user_query}, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def _get_cached_analysis(self, key: str) -> Optional[str]:
+        """Return a fresh cached analysis, or None on a miss"""
+        with self._cache_lock:
+            return _ttl_get(self._analysis_cache, key, ANALYSIS_TTL)
+
+    def _cache_analysis(self, key: str, analysis: str):
+        """Store a successful analysis"""
+        with self._cache_lock:
+            _ttl_put(self._analysis_cache, key, analysis, self._analysis_cache_cap)
 
-    def _analyze_with_llm(self, stock_data: Dict[str, Any], user_query: str) -> str:
+    def _try_answer_locally(self, stats: Dict[str, Any], query: str) -> Optional[str]:
+        """Answer a query that only asks for one statistic, or None if it needs the LLM"""
+        for pattern, name, template in self._LOCAL_ANSWERS:
+            if pattern.match(query):
+                value = stats[name]
+                # An undefined statistic (NaN) is left for the LLM to explain
+                return template.format(value) if math.isfinite(value) else None
+        return None
+
+    async def _analyze_with_llm(self, stock_data: Dict[str, Any], user_query: str) -> str:
         """Use LLM to analyze stock data and provide insights"""
         try:
             if "error" in stock_data:
                 return stock_data["error"]
 
-            stats = stock_data["statistics"]
-            prompt = f"""
-            As a financial analyst, analyze the following 30-day stock data for {stock_data['ticker']} ({stock_data.get('company_name', 'Unknown')}) and respond to the user's query: "{user_query}"
+            payload = await asyncio.to_thread(self._ticker_payload, stock_data)
+            key = self._analysis_key(payload, user_query)
+            cached = self._get_cached_analysis(key)
+            if cached is not None:
+                return cached
+
+            user_payload = orjson.dumps({**payload, "query": user_query}).decode()
+
+            # Stream the reply so cancelling the surrounding task (e.g. a
+            # caller's timeout) drops the generation instead of waiting for
+            # the full text
+            stream = await self.llm.astream_chat([
+                ChatMessage(role="system", content=_SYSTEM_PROMPT),
+                ChatMessage(role="user", content=user_payload)
+            ])
+            text_parts = []
+            async for chunk in stream:
+                text_parts.append(chunk.delta or "")
+
+            analysis = "".join(text_parts)
+            self._cache_analysis(key, analysis)
+            return analysis
+
+        except Exception as e:
+            return f"Analysis error: {str(e)}"
 
-            Stock Information:
-            - Company: {stock_data.get('company_name', 'Unknown')}
-            - Sector: {stock_data.get('sector', 'Unknown')}
-            - Market Cap: {stock_data.get('market_cap', 'Unknown')}
+    async def _analyze_batch_with_llm(self, stock_data_list: List[Dict[str, Any]], user_query: str) -> List[str]:
+        """Analyze several tickers with one LLM request, in input order"""
+        if len(stock_data_list) == 1:
+            return [await self._analyze_with_llm(stock_data_list[0], user_query)]
 
-            30-Day Statistics:
-            - Current Price: ${stats['last_close']:.2f}
-            - Price Range: ${stats['min_close']:.2f} - ${stats['max_close']:.2f}
-            - Average Price: ${stats['mean_close']:.2f}
-            - 30-Day Return: {stats['percent_change_30d']:.2f}%
-            - Volatility (Annualized): {stats['volatility_annualized']:.2f}%
-            - Standard Deviation: ${stats['std_dev_30d']:.2f}
+        # Company metadata lookups are separate blocking HTTP calls; overlap them
+        payloads = await self._map_concurrently(
+            lambda stock_data: asyncio.to_thread(self._ticker_payload, stock_data), stock_data_list
+        )
+        keys = [self._analysis_key(payload, user_query) for payload in payloads]
+        analyses = [self._get_cached_analysis(key) for key in keys]
 
-            Please provide:
-            1. A brief analysis of the stock's recent performance
-            2. Notable trends or patterns
-            3. Risk assessment based on volatility
-            4. Any relevant insights related to the user's specific query
+        # Only tickers without a cached analysis go to the LLM
+        pending = [i for i, analysis in enumerate(analyses) if analysis is None]
+        if len(pending) > 1:
+            batch = await self._request_batch_analysis([payloads[i] for i in pending], user_query)
+            if batch is not None:
+                for i, analysis in zip(pending, batch):
+                    analyses[i] = analysis
+                    self._cache_analysis(keys[i], analysis)
+                return analyses
 
-            Keep the response concise and professional.
-            """
+        # A lone miss, or a failed batch, is analyzed per ticker
+        fallback = await self._map_concurrently(
+            lambda i: self._analyze_with_llm(stock_data_list[i], user_query), pending
+        )
+        for i, analysis in zip(pending, fallback):
+            analyses[i] = analysis
+        return analyses
 
-            response = self.llm.complete(prompt)
-            return str(response)
+    async def _request_batch_analysis(self, payloads: List[Dict[str, Any]], user_query: str) -> Optional[List[str]]:
+        """Send one chat request for several tickers; None if the reply is unusable"""
+        try:
+            user_payload = orjson.dumps({"query": user_query, "stocks": payloads}).decode()
+
+            response = await self.llm.achat([
+                ChatMessage(role="system", content=_BATCH_SYSTEM_PROMPT),
+                ChatMessage(role="user", content=user_payload)
+            ], response_format={"type": "json_object"})
+
+            analyses = orjson.loads(response.message.content)["analyses"]
+            if len(analyses) == len(payloads) and all(isinstance(a, str) for a in analyses):
+                return analyses
+            self._log_error("YahooAgent", "Batch analysis returned a mismatched result; analyzing per ticker")
 
         except Exception as e:
-            return f"Analysis error: {str(e)}"
+            self._log_error("YahooAgent", f"Batch analysis failed, analyzing per ticker: {e}")
+
+        return None
+
+    async def _map_concurrently(self, func, items: List[Any]) -> List[Any]:
+        """Await func(item) for every item, at most MAX_CONCURRENCY at a time, keeping order"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        async def limited(item):
+            async with semaphore:
+                return await func(item)
+
+        return list(await asyncio.gather(*(limited(item) for item in items)))
+
+    def _process_ticker(self, ticker: str, stock_data: Dict[str, Any], analysis: Optional[str],
+                        ticker_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the response entry for a single ticker"""
+        try:
+            if "error" in stock_data:
+                return {
+                    "ticker": ticker,
+                    "error": stock_data["error"]
+                }
+
+            return {
+                "ticker": ticker,
+                "company_name": ticker_info["company_name"],
+                "sector": ticker_info["sector"],
+                "market_cap": ticker_info["market_cap"],
+                "statistics": stock_data["statistics"],
+                "llm_analysis": analysis,
+                # _compute_statistics always sets these, so no .get() fallbacks
+                "data_period": stock_data["period"],
+                "data_points": stock_data["data_points"]
+            }
+
+        except Exception as e:
+            # One failing ticker shouldn't take down the others
+            return {"ticker": ticker, "error": f"Failed to process {ticker}: {str(e)}"}
 
     def run(self, request: MCPRequest) -> MCPResponse:
         """Process Yahoo Finance query using LlamaIndex LLM"""
-        start_time = datetime.now()
+        # Callers (the router and workflow) run sync agents in a worker
+        # thread, so there is no running event loop here
+        return asyncio.run(self._arun(request))
+
+    async def _arun(self, request: MCPRequest) -> MCPResponse:
+        """Fetch and analyze every ticker, overlapping network waits"""
+        # Durations come from the monotonic clock; the wall clock is sampled
+        # once, for the outbound timestamp
+        start_ns = time.monotonic_ns()
         tickers = request.context.tickers
         user_query = request.context.user_query
         response_data = []
@@ -117,40 +498,50 @@ class YahooAgent:
                     timestamp=datetime.now()
                 )
 
-            for ticker in tickers:
-                # Fetch stock data
-                stock_data = self._fetch_stock_data(ticker)
+            # Price history for every ticker arrives in one download per chunk
+            stock_data_map = await asyncio.to_thread(self._fetch_stock_data_bulk, tickers)
+
+            fetched = [stock_data_map[ticker] for ticker in tickers if "error" not in stock_data_map[ticker]]
 
-                if "error" in stock_data:
-                    ticker_response = {
-                        "ticker": ticker,
-                        "error": stock_data["error"]
-                    }
+            # Company metadata is a separate, slow Yahoo call per ticker; resolve
+            # it for every ticker with data concurrently, before the prompts
+            # (which then hit the cache) and the response entries need it
+            ticker_infos = await self._map_concurrently(
+                lambda stock_data: asyncio.to_thread(self._get_ticker_info, stock_data["ticker"]), fetched
+            )
+            info_map = {stock_data["ticker"]: info for stock_data, info in zip(fetched, ticker_infos)}
+
+            # Questions the statistics already answer skip the LLM entirely
+            analysis_map = {}
+            pending = []
+            for stock_data in fetched:
+                local_answer = self._try_answer_locally(stock_data["statistics"], user_query)
+                if local_answer is None:
+                    pending.append(stock_data)
                 else:
-                    # Analyze with LLM
-                    analysis = self._analyze_with_llm(stock_data, user_query)
-
-                    ticker_response = {
-                        "ticker": ticker,
-                        "company_name": stock_data.get("company_name", ticker),
-                        "sector": stock_data.get("sector", "Unknown"),
-                        "market_cap": stock_data.get("market_cap", "Unknown"),
-                        "statistics": stock_data["statistics"],
-                        "llm_analysis": analysis,
-                        "data_period": stock_data.get("period", "1mo"),
-                        "data_points": stock_data.get("data_points", 0)
-                    }
-
-                response_data.append(ticker_response)
+                    analysis_map[stock_data["ticker"]] = local_answer
+
+            # Every other ticker with data is analyzed in a single LLM request
+            if pending:
+                analyses = await self._analyze_batch_with_llm(pending, user_query)
+                analysis_map.update(
+                    (stock_data["ticker"], analysis) for stock_data, analysis in zip(pending, analyses)
+                )
+
+            response_data = [
+                self._process_ticker(ticker, stock_data_map[ticker], analysis_map.get(ticker), info_map.get(ticker))
+                for ticker in tickers
+            ]
 
             status = "success"
-            self.monitor.log_health("YahooAgent", "SUCCESS", f"Processed {len(tickers)} tickers")
+            elapsed_ms = (time.monotonic_ns() - start_ns) / 1e6
+            self._log_health("YahooAgent", "SUCCESS", "Processed %d tickers in %.0f ms", len(tickers), elapsed_ms)
 
         except Exception as e:
             status = "failed"
             error_msg = str(e)
             response_data = {"error": error_msg}
-            self.monitor.log_error("YahooAgent", error_msg, {"tickers": tickers, "query": user_query})
+            self._log_error("YahooAgent", error_msg, {"tickers": tickers, "query": user_query})
 
         completed_time = datetime.now()
 
@@ -165,20 +556,45 @@ class YahooAgent:
     def get_market_summary(self, tickers: List[str]) -> Dict[str, Any]:
         """Get a market summary for multiple tickers"""
         try:
-            summary_data = []
-            for ticker in tickers:
-                data = self._fetch_stock_data(ticker)
-                if "error" not in data:
-                    summary_data.append({
-                        "ticker": ticker,
-                        "company": data.get("company_name", ticker),
-                        "last_price": data["statistics"]["last_close"],
-                        "change_30d": data["statistics"]["percent_change_30d"],
-                        "volatility": data["statistics"]["volatility_annualized"]
-                    })
-
-            return {"market_summary": summary_data}
+            frames = []
+            for start in range(0, len(tickers), BULK_CHUNK_SIZE):
+                chunk = tickers[start:start + BULK_CHUNK_SIZE]
+                try:
+                    frames.append(self._download_close_prices(chunk, period="1mo"))
+                except Exception as e:
+                    self._log_error("YahooAgent", f"Market summary download failed for {chunk}: {e}")
+
+            if not frames:
+                return {"market_summary": []}
+
+            # One column per requested ticker, in request order; tickers with
+            # no data are all-NaN columns and are left out below
+            closes = pd.concat(frames, axis=1)
+            closes = closes.loc[:, ~closes.columns.duplicated()].reindex(columns=list(dict.fromkeys(tickers)))
+            if closes.empty:
+                return {"market_summary": []}
+
+            # Whole-frame reductions over every ticker at once
+            first = closes.bfill().iloc[0]
+            last = closes.ffill().iloc[-1]
+            change = ((last / first - 1) * 100).where(first != 0, 0.0)
+            # Calendars differ between tickers (other exchanges, crypto on
+            # weekends), so returns are taken per ticker across its own gaps,
+            # matching _compute_statistics
+            volatility = closes.apply(lambda column: column.dropna().pct_change().std()) * (252 ** 0.5) * 100
+
+            summary = pd.DataFrame({
+                "ticker": closes.columns,
+                "last_price": last.to_numpy(),
+                "change_30d": change.to_numpy(),
+                "volatility": volatility.to_numpy()
+            })
+            summary = summary[last.notna().to_numpy()]
+            # Company names come from the long-lived ticker info cache
+            summary.insert(1, "company", [self._get_ticker_info(ticker)["company_name"] for ticker in summary["ticker"]])
+
+            return {"market_summary": summary.to_dict("records")}
 
         except Exception as e:
-            self.monitor.log_error("YahooAgent", f"Market summary error: {e}")
+            self._log_error("YahooAgent", f"Market summary error: {e}")
             return {"error": str(e)}
\ No newline at end of file